@@ -1,16 +1,35 @@
 # coding=utf-8
+import importlib
 import json
 import logging
 import uuid
-from datetime import datetime
-import traceback
 
 from json_logging import util
 from json_logging.framework_base import RequestAdapter, ResponseAdapter, AppRequestInstrumentationConfigurator, \
     FrameworkConfigurator
 from json_logging.util import get_library_logger, is_env_var_toggle
 
-CORRELATION_ID_GENERATOR = uuid.uuid1
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _orjson_dumps(obj):
+    """
+    orjson based serializer, returns str instead of bytes so it can be used in place of json.dumps.
+    Falls back to json.dumps for objects orjson can not encode, e.g. integers exceeding 64-bit range
+    """
+    try:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode('utf-8')
+    except TypeError:
+        return json.dumps(obj)
+
+
+# uuid4 is cheaper than uuid1 (no lock, no MAC/clock read), uuid1 can still be opted in
+CORRELATION_ID_GENERATOR = uuid.uuid4
+if is_env_var_toggle("CORRELATION_ID_GENERATOR_UUID1"):
+    CORRELATION_ID_GENERATOR = uuid.uuid1
 ENABLE_JSON_LOGGING = False
 if is_env_var_toggle("ENABLE_JSON_LOGGING"):
     ENABLE_JSON_LOGGING = True
@@ -18,18 +37,64 @@ if is_env_var_toggle("ENABLE_JSON_LOGGING"):
 ENABLE_JSON_LOGGING_DEBUG = False
 EMPTY_VALUE = '-'
 CREATE_CORRELATION_ID_IF_NOT_EXISTS = True
-JSON_SERIALIZER = json.dumps
+JSON_SERIALIZER = _orjson_dumps if orjson is not None else json.dumps
 CORRELATION_ID_HEADERS = ['X-Correlation-ID', 'X-Request-ID']
 COMPONENT_ID = EMPTY_VALUE
 COMPONENT_NAME = EMPTY_VALUE
 COMPONENT_INSTANCE_INDEX = 0
+REQUEST_LOG_BUFFER_SIZE = 65536
+REQUEST_LOG_FLUSH_INTERVAL = 1.0
 
 _framework_support_map = {}
+# built-in framework supports, their modules are only imported and registered when the framework is used
+# name -> (module, app configurator, request instrumentation configurator, request adapter, response adapter)
+_LAZY_FRAMEWORKS = {
+    'flask': ('json_logging.framework.flask', None, 'FlaskAppRequestInstrumentationConfigurator',
+              'FlaskRequestAdapter', 'FlaskResponseAdapter'),
+    'django': ('json_logging.framework.django', None, 'DjangoAppRequestInstrumentationConfigurator',
+               'DjangoRequestAdapter', 'DjangoResponseAdapter'),
+    'sanic': ('json_logging.framework.sanic', 'SanicAppConfigurator', 'SanicAppRequestInstrumentationConfigurator',
+              'SanicRequestAdapter', 'SanicResponseAdapter'),
+    'quart': ('json_logging.framework.quart', None, 'QuartAppRequestInstrumentationConfigurator',
+              'QuartRequestAdapter', 'QuartResponseAdapter'),
+    'connexion': ('json_logging.framework.connexion', None, 'ConnexionAppRequestInstrumentationConfigurator',
+                  'ConnexionRequestAdapter', 'ConnexionResponseAdapter'),
+}
 _current_framework = None
 _logger = get_library_logger(__name__)
 _request_util = None
 
 
+def _rebuild_template():
+    """
+    re-create the template of leading JSON log fields from current configuration values,
+    must be called whenever COMPONENT_ID, COMPONENT_NAME or COMPONENT_INSTANCE_INDEX is changed
+    """
+    global _BASE_LOG_TEMPLATE
+    # written_at and written_ts are placeholders, they keep the fields order when filled in per record
+    _BASE_LOG_TEMPLATE = {"type": "log",
+                          "written_at": None,
+                          "written_ts": None,
+                          "component_id": COMPONENT_ID,
+                          "component_name": COMPONENT_NAME,
+                          "component_instance": COMPONENT_INSTANCE_INDEX}
+
+
+_rebuild_template()
+
+
+def _base_log_object(epoch_ns):
+    """
+    common leading fields of every JSON log object
+
+    :param epoch_ns: nano-second since epoch when the record is written
+    """
+    json_log_object = _BASE_LOG_TEMPLATE.copy()
+    json_log_object["written_at"] = util.iso_time_format_ns(epoch_ns)
+    json_log_object["written_ts"] = epoch_ns
+    return json_log_object
+
+
 def get_correlation_id():
     """
     Get current request correlation-id. If one is not present, a new one might be generated
@@ -40,6 +105,21 @@ def get_correlation_id():
     return _request_util.get_correlation_id()
 
 
+def resolve_request_thread_fields(record):
+    """
+    Resolve request log fields that must be looked up on the request thread (write time, correlation id may be
+    stored into the request, remote user may be lazily loaded from database) and keep them on the record,
+    JSONRequestLogFormatter uses them instead of looking them up again. Must be called before a request log record
+    is handed over to another thread for formatting.
+
+    :param record: request log record
+    """
+    request = record.request_info.request
+    record.request_thread_fields = (util.time_ns(),
+                                    _request_util.get_correlation_id(request),
+                                    _request_util.request_adapter.get_remote_user(request))
+
+
 def register_framework_support(name, app_configurator, app_request_instrumentation_configurator, request_adapter_class,
                                response_adapter_class):
     """
@@ -71,6 +151,18 @@ def register_framework_support(name, app_configurator, app_request_instrumentati
     }
 
 
+def _register_lazy_framework_support(name):
+    """
+    import and register built-in support for given framework
+
+    :param name: name of framework, must be a key of _LAZY_FRAMEWORKS
+    """
+    module_name = _LAZY_FRAMEWORKS[name][0]
+    module = importlib.import_module(module_name)
+    classes = [getattr(module, class_name) if class_name else None for class_name in _LAZY_FRAMEWORKS[name][1:]]
+    register_framework_support(name, *classes)
+
+
 def config_root_logger():
     """
         You must call this if you are using root logger.
@@ -110,17 +202,23 @@ def init(framework_name=None, custom_formatter=None):
     if _current_framework is not None:
         raise RuntimeError("Can not call init more than once")
 
+    _rebuild_template()
+
     _logger.info("init framework " + str(framework_name))
 
     if framework_name:
         framework_name = framework_name.lower()
-        if framework_name not in _framework_support_map.keys():
+        if framework_name not in _framework_support_map and framework_name in _LAZY_FRAMEWORKS:
+            _register_lazy_framework_support(framework_name)
+        if framework_name not in _framework_support_map:
             raise RuntimeError(framework_name + "is not a supported framework")
 
         _current_framework = _framework_support_map[framework_name]
-        global _request_util
+        global _request_util, get_correlation_id
         _request_util = util.RequestUtil(request_adapter_class=_current_framework['request_adapter_class'],
                                          response_adapter_class=_current_framework['response_adapter_class'])
+        # skip the module level indirection from now on
+        get_correlation_id = _request_util.get_correlation_id
 
         if ENABLE_JSON_LOGGING and _current_framework['app_configurator'] is not None:
             _current_framework['app_configurator']().config()
@@ -142,7 +240,9 @@ def init(framework_name=None, custom_formatter=None):
 
     # go to all the initialized logger and update it to use JSON formatter
     _logger.debug("Update all existing logger to using JSONLogFormatter")
-    existing_loggers = list(map(logging.getLogger, logging.Logger.manager.loggerDict))
+    # loggerDict also contains PlaceHolder objects which have no handlers to update
+    existing_loggers = [logger for logger in list(logging.Logger.manager.loggerDict.values())
+                        if isinstance(logger, logging.Logger)]
     util.update_formatter_for_loggers(existing_loggers, formatter)
 
 
@@ -162,32 +262,29 @@ def init_request_instrument(app=None):
         handler.setFormatter(JSONRequestLogFormatter())
 
 
-class RequestInfo(dict):
+class RequestInfo(object):
     """
         class that keep HTTP request information for request instrumentation logging
     """
+    __slots__ = ('request', 'request_start_ns', 'request_received_at', 'response_time_ms', 'response_status',
+                 'response_size_b', 'response_content_type', 'response_sent_at')
 
-    def __init__(self, request, **kwargs):
-        super(self.__class__, self).__init__(**kwargs)
-        utcnow = datetime.utcnow()
-        self.request_start = utcnow
+    def __init__(self, request):
+        self.request_start_ns = util.monotonic_ns()
         self.request = request
-        self.request_received_at = util.iso_time_format(utcnow)
+        self.request_received_at = util.iso_time_format_ns(util.time_ns())
 
-    # noinspection PyAttributeOutsideInit
     def update_response_status(self, response):
         """
         update response information into this object, must be called before invoke request logging statement
         :param response:
         """
         response_adapter = _request_util.response_adapter
-        utcnow = datetime.utcnow()
-        time_delta = utcnow - self.request_start
-        self.response_time_ms = int(time_delta.total_seconds()) * 1000 + int(time_delta.microseconds / 1000)
+        self.response_time_ms = (util.monotonic_ns() - self.request_start_ns) // 1000000
         self.response_status = response_adapter.get_status_code(response)
         self.response_size_b = response_adapter.get_response_size(response)
         self.response_content_type = response_adapter.get_content_type(response)
-        self.response_sent_at = util.iso_time_format(utcnow)
+        self.response_sent_at = util.iso_time_format_ns(util.time_ns())
 
 
 class JSONRequestLogFormatter(logging.Formatter):
@@ -195,123 +292,89 @@ class JSONRequestLogFormatter(logging.Formatter):
        Formatter for HTTP request instrumentation logging
     """
 
+    def __init__(self, *args, **kwargs):
+        super(JSONRequestLogFormatter, self).__init__(*args, **kwargs)
+        if _request_util is None:
+            raise RuntimeError("please init the logging first, call init(framework_name) first")
+        # bound once here instead of being looked up for every record
+        self._request_adapter = _request_util.request_adapter
+        self._get_correlation_id = _request_util.get_correlation_id
+
     def format(self, record):
-        utcnow = datetime.utcnow()
-        request = record.request_info.request
-        request_adapter = _request_util.request_adapter
+        request_info = record.request_info
+        request = request_info.request
+        request_adapter = self._request_adapter
+        request_thread_fields = getattr(record, 'request_thread_fields', None)
+        if request_thread_fields is not None:
+            written_ns, correlation_id, remote_user = request_thread_fields
+        else:
+            written_ns = util.time_ns()
+            correlation_id = self._get_correlation_id(request)
+            remote_user = request_adapter.get_remote_user(request)
 
+        json_log_object = _base_log_object(written_ns)
+        json_log_object["type"] = "request"
         length = request_adapter.get_content_length(request)
-        json_log_object = {
-            "type": "request",
-            "written_at": util.iso_time_format(utcnow),
-            "written_ts": util.epoch_nano_second(utcnow),
-            "component_id": COMPONENT_ID,
-            "component_name": COMPONENT_NAME,
-            "component_instance": COMPONENT_INSTANCE_INDEX,
-            "correlation_id": _request_util.get_correlation_id(request),
-            "remote_user": request_adapter.get_remote_user(request),
-            "request": request_adapter.get_path(request),
-            "referer": request_adapter.get_http_header(request, 'referer', EMPTY_VALUE),
-            "x_forwarded_for": request_adapter.get_http_header(request, 'x-forwarded-for', EMPTY_VALUE),
-            "protocol": request_adapter.get_protocol(request),
-            "method": request_adapter.get_method(request),
-            "remote_ip": request_adapter.get_remote_ip(request),
-            "request_size_b": util.parse_int(length, -1),
-            "remote_host": request_adapter.get_remote_ip(request),
-            "remote_port": request_adapter.get_remote_port(request),
-            "request_received_at": record.request_info.request_received_at,
-            "response_time_ms": record.request_info.response_time_ms,
-            "response_status": record.request_info.response_status,
-            "response_size_b": record.request_info.response_size_b,
-            "response_content_type": record.request_info.response_content_type,
-            "response_sent_at": record.request_info.response_sent_at}
+        remote_ip = request_adapter.get_remote_ip(request)
+        json_log_object["correlation_id"] = correlation_id
+        json_log_object["remote_user"] = remote_user
+        json_log_object["request"] = request_adapter.get_path(request)
+        json_log_object["referer"] = request_adapter.get_http_header(request, 'referer', EMPTY_VALUE)
+        json_log_object["x_forwarded_for"] = request_adapter.get_http_header(request, 'x-forwarded-for', EMPTY_VALUE)
+        json_log_object["protocol"] = request_adapter.get_protocol(request)
+        json_log_object["method"] = request_adapter.get_method(request)
+        json_log_object["remote_ip"] = remote_ip
+        json_log_object["request_size_b"] = util.parse_int(length, -1)
+        json_log_object["remote_host"] = remote_ip
+        json_log_object["remote_port"] = request_adapter.get_remote_port(request)
+        json_log_object["request_received_at"] = request_info.request_received_at
+        json_log_object["response_time_ms"] = request_info.response_time_ms
+        json_log_object["response_status"] = request_info.response_status
+        json_log_object["response_size_b"] = request_info.response_size_b
+        json_log_object["response_content_type"] = request_info.response_content_type
+        json_log_object["response_sent_at"] = request_info.response_sent_at
         return JSON_SERIALIZER(json_log_object)
 
 
-class JSONLogFormatter(logging.Formatter):
+class _JSONLogFormatterBase(logging.Formatter):
     """
-    Formatter for non-web application log
+    Formatter for application log, correlation_id field is included when **include_correlation_id** is set
     """
+    include_correlation_id = False
+
+    def __init__(self, *args, **kwargs):
+        super(_JSONLogFormatterBase, self).__init__(*args, **kwargs)
+        # formatter may be created before init(framework_name), fall back to the module function in that case
+        self._get_correlation_id = _request_util.get_correlation_id if _request_util is not None \
+            else get_correlation_id
 
     def get_exc_fields(self, record):
-        if record.exc_info:
-            exc_info = self.format_exception(record.exc_info)
-        else:
-            exc_info = record.exc_text
+        # cache formatted traceback on the record like logging.Formatter.format does, so it is only formatted once
+        # no matter how many handlers the record goes through
+        if not record.exc_text and record.exc_info:
+            record.exc_text = self.formatException(record.exc_info)
         return {
-            'exc_info': exc_info,
+            'exc_info': record.exc_text,
             'filename': record.filename,
         }
 
-    @classmethod
-    def format_exception(cls, exc_info):
-
-        return ''.join(traceback.format_exception(*exc_info)) if exc_info else ''
-
     def format(self, record):
-        utcnow = datetime.utcnow()
-        json_log_object = {"type": "log",
-                           "written_at": util.iso_time_format(utcnow),
-                           "written_ts": util.epoch_nano_second(utcnow),
-                           "component_id": COMPONENT_ID,
-                           "component_name": COMPONENT_NAME,
-                           "component_instance": COMPONENT_INSTANCE_INDEX,
-                           "logger": record.name,
-                           "thread": record.threadName,
-                           "level": record.levelname,
-                           "line_no": record.lineno,
-                           "module": record.module,
-                           "msg": record.getMessage(),
-                           }
-
-        if hasattr(record, 'props'):
-            json_log_object.update(record.props)
-
-        if record.exc_info or record.exc_text:
-            json_log_object.update(self.get_exc_fields(record))
-
-        return JSON_SERIALIZER(json_log_object)
-
-
-class JSONLogWebFormatter(logging.Formatter):
-    """
-    Formatter for web application log
-    """
-
-    def get_exc_fields(self, record):
-        if record.exc_info:
-            exc_info = self.format_exception(record.exc_info)
+        json_log_object = _base_log_object(util.time_ns())
+        json_log_object["logger"] = record.name
+        json_log_object["thread"] = record.threadName
+        json_log_object["level"] = record.levelname
+        if self.include_correlation_id:
+            json_log_object["module"] = record.module
+            json_log_object["line_no"] = record.lineno
+            json_log_object["correlation_id"] = self._get_correlation_id()
         else:
-            exc_info = record.exc_text
-        return {
-            'exc_info': exc_info,
-            'filename': record.filename,
-        }
+            json_log_object["line_no"] = record.lineno
+            json_log_object["module"] = record.module
+        json_log_object["msg"] = record.getMessage()
 
-    @classmethod
-    def format_exception(cls, exc_info):
-
-        return ''.join(traceback.format_exception(*exc_info)) if exc_info else ''
-
-    def format(self, record):
-        utcnow = datetime.utcnow()
-        json_log_object = {"type": "log",
-                           "written_at": util.iso_time_format(utcnow),
-                           "written_ts": util.epoch_nano_second(utcnow),
-                           "component_id": COMPONENT_ID,
-                           "component_name": COMPONENT_NAME,
-                           "component_instance": COMPONENT_INSTANCE_INDEX,
-                           "logger": record.name,
-                           "thread": record.threadName,
-                           "level": record.levelname,
-                           "module": record.module,
-                           "line_no": record.lineno,
-                           "correlation_id": _request_util.get_correlation_id(),
-                           "msg": record.getMessage()
-                           }
-
-        if hasattr(record, 'props'):
-            json_log_object.update(record.props)
+        props = getattr(record, 'props', None)
+        if props:
+            json_log_object.update(props)
 
         if record.exc_info or record.exc_text:
             json_log_object.update(self.get_exc_fields(record))
@@ -319,44 +382,14 @@ class JSONLogWebFormatter(logging.Formatter):
         return JSON_SERIALIZER(json_log_object)
 
 
-# register flask support
-# noinspection PyPep8
-import json_logging.framework.flask as flask_support
-
-register_framework_support('flask', None, flask_support.FlaskAppRequestInstrumentationConfigurator,
-                           flask_support.FlaskRequestAdapter,
-                           flask_support.FlaskResponseAdapter)
-
-# register django support
-# noinspection PyPep8
-import json_logging.framework.django as django_support
-
-register_framework_support('django', None, django_support.DjangoAppRequestInstrumentationConfigurator,
-                           django_support.DjangoRequestAdapter,
-                           django_support.DjangoResponseAdapter)
-
-# register flask support
-# noinspection PyPep8
-from json_logging.framework.sanic import SanicAppConfigurator, SanicAppRequestInstrumentationConfigurator, \
-    SanicRequestAdapter, SanicResponseAdapter
-
-register_framework_support('sanic', SanicAppConfigurator,
-                           SanicAppRequestInstrumentationConfigurator,
-                           SanicRequestAdapter,
-                           SanicResponseAdapter)
-
-# register quart support
-# noinspection PyPep8
-import json_logging.framework.quart as quart_support
-
-register_framework_support('quart', None, quart_support.QuartAppRequestInstrumentationConfigurator,
-                        quart_support.QuartRequestAdapter,
-                        quart_support.QuartResponseAdapter)
+class JSONLogFormatter(_JSONLogFormatterBase):
+    """
+    Formatter for non-web application log
+    """
 
-# register connexion support
-# noinspection PyPep8
-import json_logging.framework.connexion as connexion_support
 
-register_framework_support('connexion', None, connexion_support.ConnexionAppRequestInstrumentationConfigurator,
-                        connexion_support.ConnexionRequestAdapter,
-                        connexion_support.ConnexionResponseAdapter)
+class JSONLogWebFormatter(_JSONLogFormatterBase):
+    """
+    Formatter for web application log
+    """
+    include_correlation_id = True
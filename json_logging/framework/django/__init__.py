@@ -1,5 +1,13 @@
 import logging
+import os
 import sys
+import threading
+
+try:
+    import queue
+except ImportError:  # pragma: no cover
+    # noinspection PyUnresolvedReferences
+    import Queue as queue
 
 import json_logging
 from json_logging.framework_base import (
@@ -16,6 +24,18 @@ def is_django_present():
         return True
 
 
+# header name -> request.META key, header names asked for are a small fixed set
+_meta_keys = {}
+
+
+def _meta_key(header_name):
+    meta_key = _meta_keys.get(header_name)
+    if meta_key is None:
+        meta_key = 'HTTP_' + header_name.upper().replace('-', '_')
+        _meta_keys[header_name] = meta_key
+    return meta_key
+
+
 class DjangoRequestAdapter(RequestAdapter):
 
     @staticmethod
@@ -28,8 +48,7 @@ class DjangoRequestAdapter(RequestAdapter):
         return HttpRequest
 
     def get_http_header(self, request, header_name, default=json_logging.EMPTY_VALUE):
-        header_name_converted = 'HTTP_' + header_name.upper().replace('-', '_')
-        return request.META.get(header_name_converted, default)
+        return request.META.get(_meta_key(header_name), default)
 
     def get_remote_user(self, request):
         if hasattr(request, 'user'):
@@ -71,8 +90,9 @@ class DjangoResponseAdapter(ResponseAdapter):
         return response.status_code
 
     def get_response_size(self, response):
-        if 'Content-Length' in response:
-            return response['Content-Length']
+        content_length = response.get('Content-Length')
+        if content_length is not None:
+            return content_length
         try:
             return response.tell()
         except OSError:
@@ -94,27 +114,126 @@ class DjangoAppRequestInstrumentationConfigurator(AppRequestInstrumentationConfi
         if not isinstance(app, BaseHandler):
             raise RuntimeError("app is not a valid django.core.handlers.BaseHandler instance")
 
+        # request logs are only enqueued on the request thread, formatting and writing them out is done by
+        # a background thread. Trade-off: logs may lag behind and queued logs are lost if the process
+        # is killed abruptly
+        stream_handler = json_logging.util.BufferedStreamHandler(
+            sys.stdout, buffer_size=json_logging.REQUEST_LOG_BUFFER_SIZE,
+            flush_interval=json_logging.REQUEST_LOG_FLUSH_INTERVAL)
+
         self.request_logger = logging.getLogger('json_logging.django')
         self.request_logger.setLevel(logging.DEBUG)
-        self.request_logger.addHandler(logging.StreamHandler(sys.stdout))
+        self.request_logger.addHandler(RequestQueueHandler(stream_handler))
 
         handler = app._middleware_chain
         mw_instance = Middleware(handler)
         app._middleware_chain = convert_exception_to_response(mw_instance)
 
 
+class RequestQueueHandler(logging.Handler):
+    """
+    Handler that enqueues request log records, a background thread hands them over to **handler** which formats
+    and writes them out. Formatter set on this handler is set on **handler**. Before enqueueing, **prepare** hook
+    is called on the request thread. Queue and thread are created by the process that emits, as threads do not
+    survive fork (e.g. app loaded in uWSGI/gunicorn --preload master process)
+    """
+
+    def __init__(self, handler):
+        self.handler = None
+        logging.Handler.__init__(self)
+        self.handler = handler
+        self._queue = None
+        self._thread = None
+        self._pid = None
+
+    @property
+    def formatter(self):
+        return self.handler.formatter
+
+    @formatter.setter
+    def formatter(self, fmt):
+        # logging.Handler.__init__ resets formatter before the wrapped handler is set, keep the one it already has
+        if self.handler is not None:
+            self.handler.formatter = fmt
+
+    def prepare(self, record):
+        """
+        hook called on the request thread right before **record** is enqueued, resolves fields that must not be
+        looked up from the background thread, see json_logging.resolve_request_thread_fields
+
+        :param record: request log record
+        """
+        json_logging.resolve_request_thread_fields(record)
+
+    def _start(self):
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._handle_queued, args=(self._queue,),
+                                        name='json-logging-request-listener')
+        self._thread.daemon = True
+        self._thread.start()
+        self._pid = os.getpid()
+
+    def _handle_queued(self, log_queue):
+        while True:
+            record = log_queue.get()
+            if record is None:
+                break
+            self.handler.handle(record)
+
+    def handle(self, record):
+        # unlike logging.Handler.handle, emit is not serialized by the handler lock, prepare may query database
+        rv = self.filter(record)
+        if rv:
+            self.emit(record)
+        return rv
+
+    def emit(self, record):
+        # noinspection PyBroadException
+        try:
+            self.prepare(record)
+            if self._pid != os.getpid():
+                self.acquire()
+                try:
+                    if self._pid != os.getpid():
+                        self._start()
+                finally:
+                    self.release()
+            self._queue.put(record)
+        except Exception:
+            self.handleError(record)
+
+    def close(self):
+        # called by logging.shutdown at exit, before the handler it feeds since it is created later
+        self.acquire()
+        try:
+            if self._pid == os.getpid():
+                self._queue.put(None)
+                self._thread.join()
+                self._pid = None
+        finally:
+            self.release()
+        logging.Handler.close(self)
+
+
 class Middleware:
 
     def __init__(self, get_response):
         self.get_response = get_response
+        self.request_logger = logging.getLogger('json_logging.django')
+        self._is_enabled_for = self.request_logger.isEnabledFor
+        self._info = self.request_logger.info
 
     def __call__(self, request):
+        # skip request instrumentation entirely if request log would be dropped anyway
+        if not self._is_enabled_for(logging.INFO):
+            return self.get_response(request)
+
         request_info = json_logging.RequestInfo(request)
         request.request_info = request_info
 
         response = self.get_response(request)
 
         request_info.update_response_status(response)
-        self.request_logger.info('', extra={'request_info': request_info})
+        self._info('', extra={'request_info': request_info})
 
         return response
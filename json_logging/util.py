@@ -2,6 +2,8 @@
 import logging
 import os
 import sys
+import threading
+import time
 from datetime import datetime
 from logging import Logger, StreamHandler
 
@@ -47,6 +49,84 @@ def update_formatter_for_loggers(loggers_iter, formatter):
                 handler.formatter = formatter()
 
 
+class BufferedStreamHandler(StreamHandler):
+    """
+    StreamHandler that collects formatted records in memory and writes them to the stream in batches, reducing
+    number of write/flush calls. Buffer is written out once it reaches **buffer_size** characters, every
+    **flush_interval** seconds by a background daemon thread and when the handler is flushed or closed.
+    Buffered records may be lost if the process is killed abruptly.
+    """
+
+    def __init__(self, stream=None, buffer_size=65536, flush_interval=1.0):
+        StreamHandler.__init__(self, stream)
+        self.buffer_size = buffer_size
+        self.flush_interval = flush_interval
+        self._buffer = []
+        self._buffered_size = 0
+        self._stop_flushing = threading.Event()
+        self._flusher_pid = None
+
+    def _start_flusher(self):
+        # threads do not survive fork (e.g. app loaded in uWSGI/gunicorn --preload master process), so flusher is
+        # started by the process that emits. Records buffered before fork are left to the parent to write out
+        self._buffer = []
+        self._buffered_size = 0
+        self._flusher_pid = os.getpid()
+        if self.flush_interval and self.flush_interval > 0:
+            self._stop_flushing = threading.Event()
+            flusher = threading.Thread(target=self._flush_periodically, args=(self._stop_flushing,),
+                                       name='json-logging-flusher')
+            flusher.daemon = True
+            flusher.start()
+
+    def _flush_periodically(self, stop_flushing):
+        while not stop_flushing.wait(self.flush_interval):
+            self.flush()
+
+    def _write_buffer(self):
+        if self._buffer:
+            self.stream.write(''.join(self._buffer))
+            self._buffer = []
+            self._buffered_size = 0
+            StreamHandler.flush(self)
+
+    def emit(self, record):
+        # noinspection PyBroadException
+        try:
+            msg = self.format(record) + '\n'
+            self.acquire()
+            try:
+                if self._flusher_pid != os.getpid():
+                    self._start_flusher()
+                self._buffer.append(msg)
+                self._buffered_size += len(msg)
+                if self._buffered_size >= self.buffer_size:
+                    self._write_buffer()
+            finally:
+                self.release()
+        except Exception:
+            self.handleError(record)
+
+    def flush(self):
+        self.acquire()
+        try:
+            if self._flusher_pid != os.getpid():
+                # buffer was inherited through fork, the parent process writes it out
+                self._buffer = []
+                self._buffered_size = 0
+            elif self.stream:
+                self._write_buffer()
+        finally:
+            self.release()
+
+    def close(self):
+        self._stop_flushing.set()
+        try:
+            self.flush()
+        finally:
+            StreamHandler.close(self)
+
+
 # noinspection PyPep8
 def parse_int(input_int, default):
     # noinspection PyBroadException
@@ -73,6 +153,8 @@ def validate_subclass(subclass, superclass):
 _epoch = datetime(1970, 1, 1)
 
 
+# epoch_nano_second and iso_time_format are no longer used by the library, formatters use time_ns and
+# iso_time_format_ns instead. They are kept as public API for custom formatters
 def epoch_nano_second(datetime_):
     return int((datetime_ - _epoch).total_seconds()) * 1000000000 + datetime_.microsecond * 1000
 
@@ -83,6 +165,40 @@ def iso_time_format(datetime_):
         int(datetime_.microsecond / 1000))
 
 
+if hasattr(time, 'time_ns'):
+    time_ns = time.time_ns
+else:  # pragma: no cover
+    def time_ns():
+        return int(time.time() * 1000000000)
+
+if hasattr(time, 'monotonic_ns'):
+    monotonic_ns = time.monotonic_ns
+else:  # pragma: no cover
+    def monotonic_ns():
+        return int(getattr(time, 'monotonic', time.time)() * 1000000000)
+
+_ISO_SECOND_FORMAT = '%Y-%m-%dT%H:%M:%S'
+# (epoch second, formatted second) of the last formatted timestamp
+_iso_second_cache = (None, None)
+
+
+def iso_time_format_ns(epoch_ns):
+    """
+    same output as iso_time_format but takes nano-second since epoch, formatting of the date-time part
+    is cached since consecutive log records are mostly written within the same second
+
+    :param epoch_ns: nano-second since epoch
+    :return: ISO 8601 YYYY-MM-DDTHH:MM:SS.milliZ string
+    """
+    global _iso_second_cache
+    seconds, nanos = divmod(epoch_ns, 1000000000)
+    cached_seconds, formatted_seconds = _iso_second_cache
+    if cached_seconds != seconds:
+        formatted_seconds = time.strftime(_ISO_SECOND_FORMAT, time.gmtime(seconds))
+        _iso_second_cache = (seconds, formatted_seconds)
+    return '%s.%03dZ' % (formatted_seconds, nanos // 1000000)
+
+
 _no_of_go_up_level = 11
 if hasattr(sys, '_getframe'):
     # noinspection PyProtectedMember,PyPep8
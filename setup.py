@@ -23,6 +23,9 @@ setup(
               "elk", "elk-stack", "logstash", "kibana"],
     platforms='any',
     url="https://github.com/thangbn/json-logging",
+    extras_require={
+        'orjson': ['orjson'],
+    },
     classifiers=[
         'Development Status :: 5 - Production/Stable',
         'Intended Audience :: Developers',
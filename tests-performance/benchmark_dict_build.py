@@ -0,0 +1,55 @@
+# coding=utf-8
+# compare ways of building the request log object in JSONRequestLogFormatter.format
+import timeit
+
+numbers = 1000000
+
+_template = {"type": "request", "written_at": None, "written_ts": None, "component_id": "-",
+             "component_name": "-", "component_instance": 0}
+_keys = tuple(_template) + tuple("field_%d" % i for i in range(17))
+_values = ("request", "2017-12-23T16:55:37.280Z", 1514048137280721000, "-", "-", 0) + tuple(range(17))
+
+
+def template_copy():
+    json_log_object = _template.copy()
+    json_log_object["written_at"] = _values[1]
+    json_log_object["written_ts"] = _values[2]
+    json_log_object["field_0"] = 0
+    json_log_object["field_1"] = 1
+    json_log_object["field_2"] = 2
+    json_log_object["field_3"] = 3
+    json_log_object["field_4"] = 4
+    json_log_object["field_5"] = 5
+    json_log_object["field_6"] = 6
+    json_log_object["field_7"] = 7
+    json_log_object["field_8"] = 8
+    json_log_object["field_9"] = 9
+    json_log_object["field_10"] = 10
+    json_log_object["field_11"] = 11
+    json_log_object["field_12"] = 12
+    json_log_object["field_13"] = 13
+    json_log_object["field_14"] = 14
+    json_log_object["field_15"] = 15
+    json_log_object["field_16"] = 16
+    return json_log_object
+
+
+def zip_keys():
+    return dict(zip(_keys, _values))
+
+
+def literal():
+    return {"type": "request", "written_at": _values[1], "written_ts": _values[2], "component_id": "-",
+            "component_name": "-", "component_instance": 0, "field_0": 0, "field_1": 1, "field_2": 2, "field_3": 3,
+            "field_4": 4, "field_5": 5, "field_6": 6, "field_7": 7, "field_8": 8, "field_9": 9, "field_10": 10,
+            "field_11": 11, "field_12": 12, "field_13": 13, "field_14": 14, "field_15": 15, "field_16": 16}
+
+
+for fn in (template_copy, zip_keys, literal):
+    print(fn.__name__, timeit.timeit(fn, number=numbers))
+
+
+# python 3.11
+# template_copy 0.74
+# zip_keys 1.56
+# literal 1.10
@@ -0,0 +1,143 @@
+# coding=utf-8
+# compare JSONRequestLogFormatter.format with a format function specialized for one request adapter,
+# i.e. adapter methods pre-bound as closure variables instead of looked up on the adapter per record
+import logging
+import timeit
+
+import json_logging
+from json_logging import util
+from json_logging.framework_base import AppRequestInstrumentationConfigurator, RequestAdapter, ResponseAdapter
+
+numbers = 200000
+
+
+class Request(object):
+    path = '/index.html'
+    method = 'GET'
+    headers = {'X-Correlation-ID': '1975a02e-e802-11e7-8971-28b2bd90b19a'}
+
+
+class Response(object):
+    status_code = 200
+
+
+class BenchmarkRequestAdapter(RequestAdapter):
+    @staticmethod
+    def support_global_request_object():
+        return False
+
+    @staticmethod
+    def get_request_class_type():
+        return Request
+
+    def get_http_header(self, request, header_name, default=None):
+        return request.headers.get(header_name, default)
+
+    def get_remote_user(self, request):
+        return json_logging.EMPTY_VALUE
+
+    def is_in_request_context(self, request):
+        return request is not None
+
+    def set_correlation_id(self, request, value):
+        pass
+
+    def get_correlation_id_in_request_context(self, request):
+        return None
+
+    def get_protocol(self, request):
+        return 'HTTP/1.1'
+
+    def get_path(self, request):
+        return request.path
+
+    def get_content_length(self, request):
+        return '1234'
+
+    def get_method(self, request):
+        return request.method
+
+    def get_remote_ip(self, request):
+        return '127.0.0.1'
+
+    def get_remote_port(self, request):
+        return 50160
+
+
+class BenchmarkResponseAdapter(ResponseAdapter):
+    def get_status_code(self, response):
+        return response.status_code
+
+    def get_response_size(self, response):
+        return 122
+
+    def get_content_type(self, response):
+        return 'text/html; charset=utf-8'
+
+
+class BenchmarkAppRequestInstrumentationConfigurator(AppRequestInstrumentationConfigurator):
+    def config(self, app):
+        self.request_logger = logging.getLogger('benchmark-request-logger')
+
+
+def specialized_format(request_adapter, get_correlation_id):
+    get_content_length = request_adapter.get_content_length
+    get_remote_ip = request_adapter.get_remote_ip
+    get_remote_user = request_adapter.get_remote_user
+    get_path = request_adapter.get_path
+    get_http_header = request_adapter.get_http_header
+    get_protocol = request_adapter.get_protocol
+    get_method = request_adapter.get_method
+    get_remote_port = request_adapter.get_remote_port
+    base_log_object = json_logging._base_log_object
+    time_ns = util.time_ns
+    parse_int = util.parse_int
+    empty_value = json_logging.EMPTY_VALUE
+
+    def format(record):
+        json_log_object = base_log_object(time_ns())
+        json_log_object["type"] = "request"
+        request_info = record.request_info
+        request = request_info.request
+        length = get_content_length(request)
+        remote_ip = get_remote_ip(request)
+        json_log_object["correlation_id"] = get_correlation_id(request)
+        json_log_object["remote_user"] = get_remote_user(request)
+        json_log_object["request"] = get_path(request)
+        json_log_object["referer"] = get_http_header(request, 'referer', empty_value)
+        json_log_object["x_forwarded_for"] = get_http_header(request, 'x-forwarded-for', empty_value)
+        json_log_object["protocol"] = get_protocol(request)
+        json_log_object["method"] = get_method(request)
+        json_log_object["remote_ip"] = remote_ip
+        json_log_object["request_size_b"] = parse_int(length, -1)
+        json_log_object["remote_host"] = remote_ip
+        json_log_object["remote_port"] = get_remote_port(request)
+        json_log_object["request_received_at"] = request_info.request_received_at
+        json_log_object["response_time_ms"] = request_info.response_time_ms
+        json_log_object["response_status"] = request_info.response_status
+        json_log_object["response_size_b"] = request_info.response_size_b
+        json_log_object["response_content_type"] = request_info.response_content_type
+        json_log_object["response_sent_at"] = request_info.response_sent_at
+        return json_logging.JSON_SERIALIZER(json_log_object)
+
+    return format
+
+
+json_logging.register_framework_support('benchmark', None, BenchmarkAppRequestInstrumentationConfigurator,
+                                        BenchmarkRequestAdapter, BenchmarkResponseAdapter)
+json_logging.init(framework_name='benchmark')
+
+request_info = json_logging.RequestInfo(Request())
+request_info.update_response_status(Response())
+log_record = logging.LogRecord('benchmark-request-logger', logging.INFO, __file__, 1, '', None, None)
+log_record.request_info = request_info
+
+formatter = json_logging.JSONRequestLogFormatter()
+specialized = specialized_format(formatter._request_adapter, formatter._get_correlation_id)
+
+print('generic', timeit.timeit(lambda: formatter.format(log_record), number=numbers))
+print('specialized', timeit.timeit(lambda: specialized(log_record), number=numbers))
+
+# python 3.11, orjson
+# generic 0.74
+# specialized 0.75